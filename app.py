@@ -1,11 +1,13 @@
 import streamlit as st
 import psycopg2
+import psycopg2.pool
+from psycopg2.extras import execute_values
 import pandas as pd
 import os
-from datetime import datetime
-from generation_agent.user_profile import UserProfile
-from generation_agent.quiz_generator import QuizGenerator, generate_dummy_assessment_quiz
-from contextlib import closing
+import io
+from collections import Counter
+from generation_agent.quiz_generator import QuizGenerator
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -20,57 +22,178 @@ DB_CONFIG = {
     'port': os.getenv('DB_PORT')
 }
 
-def get_db_connection():
+# Hot queries, prepared once per pooled connection and issued with EXECUTE <name>(...)
+PREPARED_STATEMENTS = {
+    "sel_user": "SELECT user_id FROM users WHERE user_id = $1",
+    "search_users": "SELECT user_id FROM users WHERE user_id ILIKE $1 ORDER BY created_at DESC LIMIT 10",
+    "ins_user": (
+        "INSERT INTO users (user_id) VALUES ($1) "
+        "ON CONFLICT (user_id) DO NOTHING RETURNING user_id"
+    ),
+    "sel_hist": (
+        "SELECT subject, ROUND(score::numeric, 2)::float8 AS score, "
+        "CASE passed WHEN 1 THEN 'Yes' ELSE 'No' END AS passed, "
+        "to_char(timestamp, 'YYYY-MM-DD HH24:MI') AS timestamp, "
+        "easy_count, medium_count, hard_count, "
+        "interview_results.timestamp AS cursor_ts, id AS cursor_id "
+        "FROM interview_results "
+        # Rows saved in one transaction share now(), so id breaks ties between them
+        "WHERE user_id = $1 AND ($2::timestamptz IS NULL "
+        "OR (interview_results.timestamp, id) < ($2::timestamptz, $3::integer)) "
+        "ORDER BY interview_results.timestamp DESC, id DESC LIMIT $4"
+    ),
+}
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers whether PREPARED_STATEMENTS ran on its session."""
+    statements_prepared = False
+
+def prepare_statements(conn):
+    """Register PREPARED_STATEMENTS on the connection's server session."""
+    cursor = conn.cursor()
+    # Start from a clean session so a retry can't collide with statements already prepared
+    cursor.execute("DEALLOCATE ALL")
+    for name, query in PREPARED_STATEMENTS.items():
+        cursor.execute(f"PREPARE {name} AS {query}")
+    conn.commit()
+    conn.statements_prepared = True
+
+@st.cache_resource
+def get_connection_pool():
+    """Create the process-wide PostgreSQL connection pool (shared across reruns and sessions)."""
+    return psycopg2.pool.ThreadedConnectionPool(
+        minconn=1,
+        maxconn=10,
+        # libpq keyword form keeps credentials out of a URL string
+        **DB_CONFIG,
+        application_name='streamlit-quiz',
+        connect_timeout=3,
+        # Session-level guards so a rerun abandoned mid-query can't hold a pool slot indefinitely
+        options='-c statement_timeout=5000ms -c idle_in_transaction_session_timeout=10s',
+        connection_factory=PreparedConnection
+    )
+
+@contextmanager
+def get_db_connection(prepare=True):
+    """Lease a pooled connection for the duration of a with-block; yields None on failure.
+
+    With prepare=True the hot statements are prepared on first checkout; the schema
+    bootstrap passes prepare=False because PREPARE needs the tables to exist.
+    """
     try:
-        # Full DSN approach:
-        conn = psycopg2.connect(
-            f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-        )
-        return conn
+        pool = get_connection_pool()
+        conn = pool.getconn()
     except Exception as e:
         st.error(f"Database connection error: {str(e)}")
-        return None
+        yield None
+        return
+    if prepare and not conn.statements_prepared:
+        try:
+            prepare_statements(conn)
+        except Exception as e:
+            st.error(f"Database connection error: {str(e)}")
+            # Discard the session rather than pool a connection left mid-transaction
+            pool.putconn(conn, close=True)
+            yield None
+            return
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
 
-def initialize_interview_db():
-    """Initialize the PostgreSQL database for interview quiz results."""
-    conn = get_db_connection()
-    if conn:
-        with closing(conn) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS interview_results (
-                id SERIAL PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                subject TEXT NOT NULL,
-                easy_count INTEGER NOT NULL,
-                medium_count INTEGER NOT NULL,
-                hard_count INTEGER NOT NULL,
-                score REAL NOT NULL,
-                passed INTEGER NOT NULL,
-                timestamp TIMESTAMP NOT NULL
-            )
-            ''')
+INTERVIEW_RESULTS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS interview_results (
+    id SERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    easy_count INTEGER NOT NULL,
+    medium_count INTEGER NOT NULL,
+    hard_count INTEGER NOT NULL,
+    score REAL NOT NULL,
+    passed INTEGER NOT NULL,
+    timestamp TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+'''
+
+USERS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    username TEXT,
+    email TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_users_created_at ON users (created_at DESC);
+'''
+
+# Optional upgrades as (feature, check, DDL). The check says whether the DDL is still needed, so an
+# up-to-date database needs no table ownership or locks; a failing upgrade only warns.
+SCHEMA_UPGRADES = [
+    (
+        "server-side result timestamps (tables created before the default existed)",
+        "SELECT column_default IS NULL FROM information_schema.columns "
+        "WHERE table_name = 'interview_results' AND column_name = 'timestamp'",
+        "ALTER TABLE interview_results ALTER COLUMN timestamp SET DEFAULT now()",
+    ),
+    (
+        "indexed history paging",
+        "SELECT to_regclass('idx_results_user_ts_id') IS NULL",
+        # Matches sel_hist's keyset order
+        "CREATE INDEX IF NOT EXISTS idx_results_user_ts_id ON interview_results (user_id, timestamp DESC, id DESC)",
+    ),
+    (
+        "dropping the superseded (user_id, timestamp) index",
+        "SELECT to_regclass('idx_results_user_ts') IS NOT NULL",
+        "DROP INDEX IF EXISTS idx_results_user_ts",
+    ),
+    (
+        # Lets the substring ILIKE in search_users use an index instead of a sequential scan;
+        # creating the extension needs privileges the app's role may not have
+        "indexed user search",
+        "SELECT to_regclass('idx_users_user_id_trgm') IS NULL",
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm; "
+        "CREATE INDEX IF NOT EXISTS idx_users_user_id_trgm ON users USING gin (user_id gin_trgm_ops)",
+    ),
+]
+
+def apply_schema_upgrades(conn):
+    """Apply the SCHEMA_UPGRADES that are still needed, warning about any that fail."""
+    cursor = conn.cursor()
+    for feature, check, ddl in SCHEMA_UPGRADES:
+        try:
+            cursor.execute(check)
+            row = cursor.fetchone()
+            if row and row[0]:
+                # Index builds on a large table can outlast the session's statement_timeout
+                cursor.execute("SET LOCAL statement_timeout = 0")
+                cursor.execute(ddl)
             conn.commit()
+        except psycopg2.Error as e:
+            conn.rollback()
+            st.warning(f"Skipped schema upgrade for {feature}: {str(e)}")
 
-def initialize_user_table():
-    conn = get_db_connection()
-    if conn:
-        with closing(conn) as conn:
+def initialize_database():
+    """Create the interview_results and users tables in a single round trip, then apply optional upgrades."""
+    with get_db_connection(prepare=False) as conn:
+        if conn:
             cursor = conn.cursor()
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id TEXT PRIMARY KEY,
-                username TEXT,
-                email TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
+            cursor.execute(INTERVIEW_RESULTS_SCHEMA + USERS_SCHEMA)
             conn.commit()
+            # Separate, best-effort transactions, so a missing privilege can't undo the tables
+            apply_schema_upgrades(conn)
+            return True
+    return False
+
+@st.cache_resource
+def _bootstrap_db():
+    """Run the schema DDL once per server process instead of on every rerun."""
+    if not initialize_database():
+        # Raising keeps the failure out of the cache so a later rerun can retry
+        raise RuntimeError("Database connection failed")
+    return True
 
 # Initialize tables when the app starts
 try:
-    initialize_interview_db()
-    initialize_user_table()
+    _bootstrap_db()
     st.session_state.db_initialized = True
 except Exception as e:
     st.error(f"Failed to initialize database: {str(e)}")
@@ -84,70 +207,62 @@ def search_users(search_term):
     if not search_term:
         return []
         
-    conn = get_db_connection()
-    if conn:
-        with closing(conn) as conn:
+    with get_db_connection() as conn:
+        if conn:
             cursor = conn.cursor()
             try:
                 # Use LIKE query for partial matching
-                cursor.execute(
-                    "SELECT user_id FROM users WHERE user_id ILIKE %s ORDER BY created_at DESC LIMIT 10", 
-                    (f"%{search_term}%",)
-                )
-                return [row[0] for row in cursor.fetchall()]
+                cursor.execute("EXECUTE search_users(%s)", (f"%{search_term}%",))
+                return [row[0] for row in cursor]
             except Exception as e:
                 st.error(f"Error searching users: {str(e)}")
     return []
 
 def create_new_user(user_id):
     """Create a new user in the database."""
-    conn = get_db_connection()
-    if conn:
-        with closing(conn) as conn:
+    with get_db_connection() as conn:
+        if conn:
             cursor = conn.cursor()
             try:
-                # Check if user already exists
-                cursor.execute("SELECT user_id FROM users WHERE user_id = %s", (user_id,))
-                if cursor.fetchone():
-                    return False, "User ID already exists"
-                
-                # Insert new user
-                cursor.execute(
-                    "INSERT INTO users (user_id, created_at) VALUES (%s, %s)",
-                    (user_id, datetime.now())
-                )
+                # Insert the user unless it already exists; no row comes back on conflict
+                cursor.execute("EXECUTE ins_user(%s)", (user_id,))
+                created = cursor.fetchone()
                 conn.commit()
+                if not created:
+                    return False, "User ID already exists"
                 return True, "User created successfully"
             except Exception as e:
-                conn.rollback()
                 return False, f"Error creating user: {str(e)}"
     return False, "Database connection failed"
 
+@st.cache_resource
+def get_quiz_generator():
+    """Create the QuizGenerator (and its LLM client) once per process, shared by all sessions."""
+    return QuizGenerator()
+
 def login_user(user_id):
     """Handle user login and initialize QuizGenerator."""
     try:
-        conn = get_db_connection()
-        if conn:
-            with closing(conn) as conn:
+        with get_db_connection() as conn:
+            if conn:
                 cursor = conn.cursor()
                 # Check if user exists
-                cursor.execute("SELECT user_id FROM users WHERE user_id = %s", (user_id,))
+                cursor.execute("EXECUTE sel_user(%s)", (user_id,))
                 user = cursor.fetchone()
                 
                 if user:
                     # User exists, proceed with login
-                    user_profile = UserProfile(user_id)
                     st.session_state.user_id = user_id
                     st.session_state.logged_in = True
-                    st.session_state.quiz_generator = QuizGenerator()
+                    get_quiz_generator()
                     return True
                 else:
                     # User doesn't exist
                     st.warning(f"No user found with ID: {user_id}")
                     return False
-        else:
-            st.error("Database connection failed. Cannot log in.")
-            return False
+            else:
+                st.error("Database connection failed. Cannot log in.")
+                return False
     except Exception as e:
         st.error(f"Error logging in: {str(e)}")
         return False
@@ -161,8 +276,7 @@ def user_login_form():
         st.error("Database is not properly initialized. Please check your environment variables and connection settings.")
         if st.button("Retry Database Connection"):
             try:
-                initialize_interview_db()
-                initialize_user_table()
+                _bootstrap_db()
                 st.session_state.db_initialized = True
                 st.success("Database connection successful!")
                 st.rerun()
@@ -221,55 +335,108 @@ if "logged_in" not in st.session_state:
     st.session_state.quiz_results = None
     st.session_state.show_feedback = False
     st.session_state.db_initialized = False
+    st.session_state.history_cursors = [None]
+    # CSV export bytes, produced only on request and dropped when history changes
+    st.session_state.history_csv = None
 
-def save_quiz_result(user_id, subject, easy_count, medium_count, hard_count, score, passed):
-    """Save quiz results to the PostgreSQL database."""
-    timestamp = datetime.now()
-    conn = get_db_connection()
-    if conn:
-        with closing(conn) as conn:
+def save_quiz_results_bulk(rows):
+    """Save many quiz results in one INSERT round trip.
+
+    Each row is a tuple of (user_id, subject, easy_count, medium_count, hard_count, score, passed);
+    the server stamps the timestamp column.
+    """
+    with get_db_connection() as conn:
+        if conn:
             cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO interview_results (user_id, subject, easy_count, medium_count, hard_count, score, passed, timestamp) "
-                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
-                (user_id, subject, easy_count, medium_count, hard_count, score, 1 if passed else 0, timestamp)
+            execute_values(
+                cursor,
+                "INSERT INTO interview_results (user_id, subject, easy_count, medium_count, hard_count, score, passed) "
+                "VALUES %s",
+                rows,
+                page_size=100
             )
             conn.commit()
             return True
     return False
 
-def get_user_quiz_history(user_id):
-    """Retrieve user's quiz history from PostgreSQL."""
-    conn = get_db_connection()
-    if conn:
-        with closing(conn) as conn:
+def save_quiz_result(user_id, subject, easy_count, medium_count, hard_count, score, passed):
+    """Save quiz results to the PostgreSQL database."""
+    return save_quiz_results_bulk(
+        [(user_id, subject, easy_count, medium_count, hard_count, score, 1 if passed else 0)]
+    )
+
+# Number of history rows fetched per "Load more" page
+HISTORY_PAGE_SIZE = 50
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_history_page(user_id, before, limit):
+    """Fetch one history page; raises on failure so errors are never cached."""
+    before_ts, before_id = before or (None, None)
+    with get_db_connection() as conn:
+        if not conn:
+            raise RuntimeError("Database connection failed")
+        # Projection and display formatting happen server-side (see sel_hist)
+        cursor = conn.cursor()
+        cursor.execute("EXECUTE sel_hist(%s, %s, %s, %s)", (user_id, before_ts, before_id, limit))
+        # Build the frame from the cursor directly rather than pandas' raw-DBAPI fallback
+        return pd.DataFrame(cursor.fetchall(), columns=[col.name for col in cursor.description])
+
+def get_user_quiz_history(user_id, before=None, limit=HISTORY_PAGE_SIZE):
+    """Retrieve one page of the user's quiz history from PostgreSQL, newest first.
+
+    Pages are keyset-paginated: pass the last row's (cursor_ts, cursor_id) as `before` to get
+    the next one. Successful pages are cached per arguments and cleared on save.
+    """
+    try:
+        return _fetch_history_page(user_id, before, limit)
+    except Exception as e:
+        st.error(f"Error fetching quiz history: {str(e)}")
+        return pd.DataFrame()  # Return empty DataFrame on error
+
+def export_history_csv(user_id):
+    """Export the user's full quiz history as CSV bytes streamed straight from Postgres via COPY.
+
+    Not cached: it only runs when the user asks for the file (see view_history).
+    """
+    with get_db_connection() as conn:
+        if conn:
             try:
-                df = pd.read_sql_query(
-                    "SELECT * FROM interview_results WHERE user_id = %s ORDER BY timestamp DESC", 
-                    conn, 
-                    params=(user_id,)
-                )
-                return df
+                cursor = conn.cursor()
+                # COPY does not take bind parameters, so inline the user_id as a quoted literal
+                query = cursor.mogrify(
+                    "COPY (SELECT subject, ROUND(score::numeric, 2)::float8 AS score, "
+                    "CASE passed WHEN 1 THEN 'Yes' ELSE 'No' END AS passed, "
+                    "to_char(timestamp, 'YYYY-MM-DD HH24:MI') AS timestamp, "
+                    "easy_count, medium_count, hard_count "
+                    "FROM interview_results WHERE user_id = %s "
+                    "ORDER BY interview_results.timestamp DESC, id DESC) TO STDOUT WITH CSV HEADER",
+                    (user_id,)
+                ).decode()
+                buf = io.BytesIO()
+                cursor.copy_expert(query, buf)
+                return buf.getvalue()
             except Exception as e:
-                st.error(f"Error fetching quiz history: {str(e)}")
-    return pd.DataFrame()  # Return empty DataFrame on error
+                st.error(f"Error exporting quiz history: {str(e)}")
+    return None
 
 def evaluate_quiz(questions, user_answers):
     """Evaluate the quiz and return results."""
     total_questions = len(questions)
-    correct = sum(1 for i, q in enumerate(questions) if user_answers[i] == q["correct_option"])
-    score = (correct / total_questions) * 100
-    passed = score >= 70
+    correct = 0
     feedback = []
     for i, q in enumerate(questions):
         user_answer = user_answers[i]
+        is_correct = user_answer == q["correct_option"]
+        correct += is_correct
         feedback.append({
             "question": q["question"],
             "user_answer": q["options"][user_answer] if user_answer != -1 else "Not answered",
             "correct_answer": q["options"][q["correct_option"]],
-            "is_correct": user_answer == q["correct_option"],
+            "is_correct": is_correct,
             "explanation": q["explanation"]
         })
+    score = (correct / total_questions) * 100
+    passed = score >= 70
     return {"score": score, "passed": passed, "feedback": feedback}
 
 def display_quiz():
@@ -279,24 +446,33 @@ def display_quiz():
         return
 
     st.subheader("Your Interview Quiz")
-    for i, q in enumerate(st.session_state.current_questions):
-        options = q["options"]
-        st.write(f"**Question {i+1} ({q['difficulty']}): {q['question']}**")
-        
-        if st.session_state.user_answers[i] == -1:
-            answer = st.radio(f"Select your answer for Q{i+1}", options, key=f"q{i}")
-        else:
-            answer = st.radio(f"Select your answer for Q{i+1}", options, key=f"q{i}", index=st.session_state.user_answers[i])
-        
-        st.session_state.user_answers[i] = options.index(answer) if answer in options else -1
+    # Inside a form, answer clicks are batched client-side and only the submit reruns the script
+    with st.form("quiz_form"):
+        answers = []
+        for i, q in enumerate(st.session_state.current_questions):
+            options = q["options"]
+            st.write(f"**Question {i+1} ({q['difficulty']}): {q['question']}**")
 
-    if st.button("Submit Quiz"):
+            if st.session_state.user_answers[i] == -1:
+                answer = st.radio(f"Select your answer for Q{i+1}", options, key=f"q{i}")
+            else:
+                answer = st.radio(f"Select your answer for Q{i+1}", options, key=f"q{i}", index=st.session_state.user_answers[i])
+            answers.append(answer)
+
+        submitted = st.form_submit_button("Submit Quiz")
+
+    if submitted:
+        st.session_state.user_answers = [
+            q["_opt_index"].get(answer, -1)
+            for q, answer in zip(st.session_state.current_questions, answers)
+        ]
         results = evaluate_quiz(st.session_state.current_questions, st.session_state.user_answers)
         st.session_state.quiz_results = results
         st.session_state.quiz_submitted = True
-        easy_count = sum(1 for q in st.session_state.current_questions if q["difficulty"] == "easy")
-        medium_count = sum(1 for q in st.session_state.current_questions if q["difficulty"] == "medium")
-        hard_count = sum(1 for q in st.session_state.current_questions if q["difficulty"] == "hard")
+        difficulty_counts = Counter(q["difficulty"] for q in st.session_state.current_questions)
+        easy_count = difficulty_counts["easy"]
+        medium_count = difficulty_counts["medium"]
+        hard_count = difficulty_counts["hard"]
         
         if save_quiz_result(
             st.session_state.user_id,
@@ -307,6 +483,9 @@ def display_quiz():
             results["score"],
             results["passed"]
         ):
+            _fetch_history_page.clear()
+            st.session_state.history_cursors = [None]
+            st.session_state.history_csv = None
             st.success("Quiz submitted successfully!")
         else:
             st.error("Failed to save quiz results")
@@ -341,15 +520,15 @@ def take_quiz():
     if st.button("Generate Quiz"):
         with st.spinner("Generating questions..."):
             try:
-                if 'quiz_generator' in st.session_state:
-                    questions = st.session_state.quiz_generator.generate_assessment_quiz(subject, num_easy, num_medium, num_hard)
-                    if not st.session_state.quiz_generator.use_llm:
-                        st.warning("Using dummy questions as AI generation is unavailable.")
-                else:
-                    questions = generate_dummy_assessment_quiz(subject, num_easy, num_medium, num_hard)
+                quiz_generator = get_quiz_generator()
+                questions = quiz_generator.generate_assessment_quiz(subject, num_easy, num_medium, num_hard)
+                if not quiz_generator.use_llm:
                     st.warning("Using dummy questions as AI generation is unavailable.")
                 
                 if questions:
+                    # Precompute option -> index maps so submission avoids list.index scans
+                    for q in questions:
+                        q["_opt_index"] = {option: i for i, option in enumerate(q["options"])}
                     st.session_state.current_questions = questions
                     st.session_state.user_answers = [-1] * len(questions)
                     st.session_state.quiz_submitted = False
@@ -366,33 +545,33 @@ def take_quiz():
 def view_history():
     """Display the user's quiz history."""
     st.subheader("Quiz History")
-    history = get_user_quiz_history(st.session_state.user_id)
+    # One (timestamp, id) keyset cursor per loaded page; None fetches the newest page
+    pages = [get_user_quiz_history(st.session_state.user_id, before) for before in st.session_state.history_cursors]
+    history = pd.concat(pages, ignore_index=True)
     if not history.empty:
-        # Format the timestamp column for better readability
-        if 'timestamp' in history.columns:
-            history['timestamp'] = pd.to_datetime(history['timestamp']).dt.strftime('%Y-%m-%d %H:%M')
-        
-        # Format other columns
-        if 'score' in history.columns:
-            history['score'] = history['score'].round(2)
-        
-        if 'passed' in history.columns:
-            history['passed'] = history['passed'].map({1: 'Yes', 0: 'No'})
-        
-        # Display the dataframe
-        st.dataframe(
-            history[["subject", "score", "passed", "timestamp", "easy_count", "medium_count", "hard_count"]],
-            use_container_width=True
-        )
+        last = history.iloc[-1]
+        # pd.Timestamp accepts both a Timestamp and the plain datetime pandas leaves in an
+        # object column when a page's timestamptz values carry different UTC offsets (DST)
+        next_cursor = (pd.Timestamp(last["cursor_ts"]).to_pydatetime(), int(last["cursor_id"]))
+        history = history.drop(columns=["cursor_ts", "cursor_id"])
+
+        # Display the dataframe (columns are already projected and formatted by the query)
+        st.dataframe(history, use_container_width=True)
+
+        if len(pages[-1]) == HISTORY_PAGE_SIZE and st.button("Load more"):
+            st.session_state.history_cursors.append(next_cursor)
+            st.rerun()
         
-        # Add a download button for the history
-        csv = history.to_csv(index=False)
-        st.download_button(
-            label="Download History as CSV",
-            data=csv,
-            file_name=f"{st.session_state.user_id}_quiz_history.csv",
-            mime="text/csv"
-        )
+        # The full-history export is only built on request, so a page load stays one page of rows
+        if st.session_state.history_csv is None and st.button("Prepare CSV"):
+            st.session_state.history_csv = export_history_csv(st.session_state.user_id)
+        if st.session_state.history_csv is not None:
+            st.download_button(
+                label="Download History as CSV",
+                data=st.session_state.history_csv,
+                file_name=f"{st.session_state.user_id}_quiz_history.csv",
+                mime="text/csv"
+            )
     else:
         st.info("No quiz history available yet.")
 
@@ -416,8 +595,9 @@ def main():
         elif choice == "Logout":
             st.session_state.logged_in = False
             st.session_state.user_id = None
-            st.session_state.quiz_generator = None
             st.session_state.current_questions = []
+            st.session_state.history_cursors = [None]
+            st.session_state.history_csv = None
             st.success("Logged out successfully!")
             st.rerun()
 
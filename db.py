@@ -1,10 +1,19 @@
+import argparse
+import io
 import sqlite3
 import psycopg2
+from psycopg2.extras import execute_values
 from contextlib import closing
 
 # SQLite file path
 SQLITE_DB_PATH = 'user_profiles.db'
 
+# Rows read from SQLite and loaded into PostgreSQL per batch
+BATCH_SIZE = 10000
+
+# Rows per multi-VALUES INSERT statement on the fallback path
+INSERT_PAGE_SIZE = 1000
+
 # PostgreSQL configuration (adjust accordingly)
 POSTGRES_CONFIG = {
     'dbname': 'interviewdb_yvnj',
@@ -14,7 +23,57 @@ POSTGRES_CONFIG = {
     'port': '5432'
 }
 
-def migrate_user_profiles():
+def _csv_field(value):
+    """Encode one value for COPY ... (FORMAT CSV).
+
+    None stays an unquoted empty field (NULL); everything else is quoted, so an empty
+    string loads as '' just as it does through insert_rows.
+    """
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+def copy_rows(pg_cursor, rows):
+    """Stream rows into a staging table with COPY, then merge them into user_profiles.
+
+    The merge skips existing users the same way ON CONFLICT DO NOTHING does per row.
+    Adjust the columns to match your schema.
+    """
+    pg_cursor.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS user_profiles_staging (LIKE user_profiles) ON COMMIT DROP"
+    )
+    # csv.writer can't tell '' from None (both become an unquoted empty field, i.e. NULL)
+    buf = io.StringIO("".join(",".join(map(_csv_field, row)) + "\n" for row in rows))
+    pg_cursor.copy_expert(
+        "COPY user_profiles_staging (user_id, username, email, created_at) FROM STDIN WITH (FORMAT CSV)",
+        buf
+    )
+    pg_cursor.execute(
+        "INSERT INTO user_profiles SELECT * FROM user_profiles_staging "
+        "ON CONFLICT (user_id) DO NOTHING"
+    )
+    # The staging table is reused by the next batch within the same transaction
+    pg_cursor.execute("TRUNCATE user_profiles_staging")
+
+def insert_rows(pg_cursor, rows):
+    """Insert rows with multi-VALUES statements, one round trip per page.
+
+    Adjust the columns to match your schema.
+    """
+    execute_values(
+        pg_cursor,
+        "INSERT INTO user_profiles (user_id, username, email, created_at) VALUES %s "
+        "ON CONFLICT (user_id) DO NOTHING",
+        rows,
+        template="(%s, %s, %s, %s)",
+        page_size=INSERT_PAGE_SIZE
+    )
+
+def migrate_user_profiles(mode="copy", unlogged=False):
+    # mode="copy" streams batches through COPY (falling back to INSERT if COPY fails);
+    # mode="rows" goes straight to batched multi-VALUES INSERTs.
+    # unlogged=True skips WAL for the load by making user_profiles UNLOGGED until it finishes;
+    # only use it when the migration can simply be rerun after a crash.
     # Connect to SQLite database
     sqlite_conn = sqlite3.connect(SQLITE_DB_PATH)
     sqlite_cursor = sqlite_conn.cursor()
@@ -27,10 +86,9 @@ def migrate_user_profiles():
         sqlite_conn.close()
         return
     
-    rows = sqlite_cursor.fetchall()
     # Get column names (assuming the first row contains column names)
     column_names = [description[0] for description in sqlite_cursor.description]
-    print(f"Found {len(rows)} rows with columns: {column_names}")
+    print(f"Migrating rows with columns: {column_names}")
     
     # Connect to PostgreSQL
     try:
@@ -57,27 +115,53 @@ def migrate_user_profiles():
             pg_conn.commit()
             print("PostgreSQL table 'user_profiles' ensured.")
 
-            # Prepare the INSERT query.
-            # Adjust the columns to match your schema.
-            insert_query = """
-            INSERT INTO user_profiles (user_id, username, email, created_at)
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (user_id) DO NOTHING;
-            """
-            # Loop through the rows and insert them.
-            for row in rows:
-                # Map SQLite row to PostgreSQL expected order.
-                # Ensure the order of the columns in the SELECT matches the order here.
-                try:
-                    pg_cursor.execute(insert_query, row)
-                except psycopg2.Error as e:
-                    print(f"Error inserting row {row}: {e}")
+            # Stream SQLite rows in batches so memory stays O(batch) rather than O(table)
+            use_copy = mode == "copy"
+            total_rows = 0
+            try:
+                # The whole load is one transaction; skip the fsync wait on its commit
+                pg_cursor.execute("SET LOCAL synchronous_commit TO OFF")
+                if unlogged:
+                    pg_cursor.execute("ALTER TABLE user_profiles SET UNLOGGED")
+                while True:
+                    rows = sqlite_cursor.fetchmany(BATCH_SIZE)
+                    if not rows:
+                        break
+                    if use_copy:
+                        # The savepoint keeps earlier batches if COPY fails on this one
+                        pg_cursor.execute("SAVEPOINT copy_batch")
+                        try:
+                            copy_rows(pg_cursor, rows)
+                        except psycopg2.Error as e:
+                            # COPY may be unavailable (e.g. behind a proxy or without privileges)
+                            print(f"COPY failed ({e}); falling back to batched INSERT.")
+                            pg_cursor.execute("ROLLBACK TO SAVEPOINT copy_batch")
+                            use_copy = False
+                        # Release it so savepoints don't pile up as nested subtransactions
+                        pg_cursor.execute("RELEASE SAVEPOINT copy_batch")
+                    if not use_copy:
+                        insert_rows(pg_cursor, rows)
+                    total_rows += len(rows)
+            except psycopg2.Error as e:
+                print(f"Error inserting rows: {e}")
+                pg_conn.rollback()
+                sqlite_conn.close()
+                return
             
             pg_conn.commit()
-            print("Data migration completed successfully.")
+            if unlogged:
+                pg_cursor.execute("ALTER TABLE user_profiles SET LOGGED")
+                pg_conn.commit()
+            print(f"Data migration completed successfully ({total_rows} rows).")
 
     # Close the SQLite connection
     sqlite_conn.close()
 
 if __name__ == "__main__":
-    migrate_user_profiles()
+    parser = argparse.ArgumentParser(description="Migrate SQLite user profiles to PostgreSQL.")
+    parser.add_argument("--mode", choices=["copy", "rows"], default="copy",
+                        help="load with COPY (default) or with batched INSERTs")
+    parser.add_argument("--unlogged", action="store_true",
+                        help="make user_profiles UNLOGGED while loading")
+    args = parser.parse_args()
+    migrate_user_profiles(mode=args.mode, unlogged=args.unlogged)
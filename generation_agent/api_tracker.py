@@ -1,9 +1,20 @@
 from datetime import datetime
 import os
-from typing import Dict, List, Tuple, Optional
+import time
+import sys
+from typing import Dict, List, Tuple, Optional, Set
 from dataclasses import dataclass, field
 from collections import defaultdict
-import json
+from array import array
+import queue
+import threading
+import orjson
+
+# Guards creation of the APITracker singleton
+_instance_lock = threading.Lock()
+
+# Write buffer for export_logs (1 MiB)
+EXPORT_BUFFER_SIZE = 1 << 20
 
 @dataclass
 class APICall:
@@ -21,132 +32,236 @@ class APICall:
 
 class APITracker:
     _instance = None
+    # Set to True to record calls without printing them
+    quiet = False
+    # Directories export_logs has already created
+    _ensured_dirs: Set[str] = set()
     
     def __new__(cls):
+        # Lock only around first construction; track_call only enqueues, and the log thread is the
+        # sole writer of the call log (reset and readers synchronize with it through _state_lock)
         if cls._instance is None:
-            cls._instance = super(APITracker, cls).__new__(cls)
-            cls._instance.initialize()
+            with _instance_lock:
+                if cls._instance is None:
+                    instance = super(APITracker, cls).__new__(cls)
+                    instance.initialize()
+                    cls._instance = instance
         return cls._instance
     
     def initialize(self):
-        self.calls: List[APICall] = []
-        self.service_costs = defaultdict(float)
-        self.total_cost = 0.0
-        self.total_tokens = 0
-        self.total_input_tokens = 0
-        self.total_output_tokens = 0
+        # Held while a call is recorded, the state is rebound, or a snapshot of it is taken, so
+        # readers never see the columns or aggregates half-updated
+        self._state_lock = threading.Lock()
+        self._reset_state()
+        # Calls are recorded and printed by a daemon log thread, the sole writer of the tracker state
+        self._queue = queue.Queue()
+        threading.Thread(target=self._drain, name="APITracker-log", daemon=True).start()
+    
+    def _reset_state(self):
+        """Bind fresh containers for the call log and aggregates"""
+        # Call log stored column-wise (structure of arrays): one column per APICall field,
+        # numeric columns in compact typed arrays; timestamps are epoch nanoseconds
+        self._timestamps = array('q')
+        self._services: List[str] = []
+        self._endpoints: List[str] = []
+        self._statuses: List[str] = []
+        self._models: List[str] = []
+        self._durations = array('d')
+        self._costs = array('d')
+        self._input_tokens = array('q')
+        self._output_tokens = array('q')
+        self._prompt_sizes = array('q')
+        self._service_costs = defaultdict(float)
+        # Running per-service/per-status aggregates so get_summary doesn't rescan the log
+        self._calls_by_service = defaultdict(int)
+        self._calls_by_status = defaultdict(int)
+        self._tokens_by_service = defaultdict(lambda: {"input": 0, "output": 0, "total": 0})
+        self._total_cost = 0.0
+        self._total_tokens = 0
+        self._total_input_tokens = 0
+        self._total_output_tokens = 0
         
     def track_call(self, service: str, endpoint: str, status: str, duration: float, cost: float = 0.0, 
                   input_tokens: int = 0, output_tokens: int = 0, model: str = "unknown", prompt_size: int = 0):
-        """Track an API call with its details"""
+        """Track an API call with its details (queued; recorded and printed off the caller's thread)"""
+        self._queue.put((time.time_ns(), service, endpoint, status, duration, cost,
+                         input_tokens, output_tokens, model, prompt_size))
+    
+    def _drain(self):
+        """Log thread loop: record queued calls one at a time"""
+        while True:
+            call = self._queue.get()
+            try:
+                self._record_call(*call)
+            except Exception as e:
+                print(f"[API Tracker] Failed to record call: {e}")
+            finally:
+                self._queue.task_done()
+    
+    def _wait_for_pending(self):
+        """Block until every queued call has been recorded"""
+        self._queue.join()
+    
+    def _record_call(self, timestamp: int, service: str, endpoint: str, status: str, duration: float,
+                     cost: float, input_tokens: int, output_tokens: int, model: str, prompt_size: int):
+        """Append a call to the log, update the aggregates and print it to the terminal"""
         total_tokens = input_tokens + output_tokens
-        call = APICall(
-            timestamp=datetime.now(),
-            service=service,
-            endpoint=endpoint,
-            status=status,
-            duration=duration,
-            cost=cost,
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-            total_tokens=total_tokens,
-            model=model,
-            prompt_size=prompt_size
-        )
-        self.calls.append(call)
-        self.service_costs[service] += cost
-        self.total_cost += cost
-        self.total_tokens += total_tokens
-        self.total_input_tokens += input_tokens
-        self.total_output_tokens += output_tokens
+        with self._state_lock:
+            self._timestamps.append(timestamp)
+            self._services.append(service)
+            self._endpoints.append(endpoint)
+            self._statuses.append(status)
+            self._models.append(model)
+            self._durations.append(duration)
+            self._costs.append(cost)
+            self._input_tokens.append(input_tokens)
+            self._output_tokens.append(output_tokens)
+            self._prompt_sizes.append(prompt_size)
+            self._service_costs[service] += cost
+            self._calls_by_service[service] += 1
+            self._calls_by_status[status] += 1
+            service_tokens = self._tokens_by_service[service]
+            service_tokens["input"] += input_tokens
+            service_tokens["output"] += output_tokens
+            service_tokens["total"] += total_tokens
+            self._total_cost += cost
+            self._total_tokens += total_tokens
+            self._total_input_tokens += input_tokens
+            self._total_output_tokens += output_tokens
+            service_cost = self._service_costs[service]
+            totals = (self._total_cost, self._total_tokens, self._total_input_tokens, self._total_output_tokens)
         
-        # Print to terminal
-        print(f"\n[API Call] {service} - {endpoint}")
-        print(f"Status: {status}")
-        print(f"Duration: {duration:.2f}s")
-        print(f"Model: {model}")
-        print(f"Tokens: {input_tokens} input, {output_tokens} output, {total_tokens} total")
-        print(f"Prompt size: {prompt_size} characters")
-        if cost > 0:
-            print(f"Cost: ${cost:.4f}")
-        print(f"Total {service} cost: ${self.service_costs[service]:.4f}")
-        print(f"Total API cost: ${self.total_cost:.4f}")
-        print(f"Total tokens used: {self.total_tokens} (Input: {self.total_input_tokens}, Output: {self.total_output_tokens})")
-        print("-" * 50)
+        # Print to terminal as a single write, outside the lock
+        if self.quiet:
+            return
+        total_cost, total_tokens_used, total_input_tokens, total_output_tokens = totals
+        cost_line = f"Cost: ${cost:.4f}\n" if cost > 0 else ""
+        sys.stdout.write(
+            f"\n[API Call] {service} - {endpoint}\n"
+            f"Status: {status}\n"
+            f"Duration: {duration:.2f}s\n"
+            f"Model: {model}\n"
+            f"Tokens: {input_tokens} input, {output_tokens} output, {total_tokens} total\n"
+            f"Prompt size: {prompt_size} characters\n"
+            f"{cost_line}"
+            f"Total {service} cost: ${service_cost:.4f}\n"
+            f"Total API cost: ${total_cost:.4f}\n"
+            f"Total tokens used: {total_tokens_used} (Input: {total_input_tokens}, Output: {total_output_tokens})\n"
+            + "-" * 50 + "\n"
+        )
+    
+    @property
+    def calls(self) -> List[APICall]:
+        """Rebuild the call log as APICall records"""
+        self._wait_for_pending()
+        with self._state_lock:
+            rows = list(zip(self._timestamps, self._services, self._endpoints, self._statuses, self._models,
+                            self._durations, self._costs, self._input_tokens, self._output_tokens,
+                            self._prompt_sizes))
+        return [
+            APICall(
+                timestamp=datetime.fromtimestamp(timestamp / 1e9),
+                service=service,
+                endpoint=endpoint,
+                status=status,
+                duration=duration,
+                cost=cost,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                total_tokens=input_tokens + output_tokens,
+                model=model,
+                prompt_size=prompt_size
+            )
+            for timestamp, service, endpoint, status, model, duration, cost, input_tokens, output_tokens, prompt_size
+            in rows
+        ]
+    
+    def _read_total(self, name):
+        """Read a running total once every queued call has been recorded"""
+        self._wait_for_pending()
+        with self._state_lock:
+            return getattr(self, name)
+    
+    @property
+    def total_cost(self) -> float:
+        """Total cost of every call tracked so far"""
+        return self._read_total("_total_cost")
+    
+    @property
+    def total_tokens(self) -> int:
+        """Total tokens of every call tracked so far"""
+        return self._read_total("_total_tokens")
+    
+    @property
+    def total_input_tokens(self) -> int:
+        """Total input tokens of every call tracked so far"""
+        return self._read_total("_total_input_tokens")
+    
+    @property
+    def total_output_tokens(self) -> int:
+        """Total output tokens of every call tracked so far"""
+        return self._read_total("_total_output_tokens")
+    
+    @property
+    def service_costs(self) -> Dict[str, float]:
+        """Cost per service of every call tracked so far, as a snapshot"""
+        self._wait_for_pending()
+        with self._state_lock:
+            return dict(self._service_costs)
     
     def get_summary(self) -> Dict:
         """Get a summary of all API calls"""
-        return {
-            "total_calls": len(self.calls),
-            "total_cost": self.total_cost,
-            "total_tokens": self.total_tokens,
-            "total_input_tokens": self.total_input_tokens,
-            "total_output_tokens": self.total_output_tokens,
-            "service_costs": dict(self.service_costs),
-            "calls_by_service": self._get_calls_by_service(),
-            "calls_by_status": self._get_calls_by_status(),
-            "token_usage_by_service": self._get_token_usage_by_service()
-        }
+        self._wait_for_pending()
+        with self._state_lock:
+            return {
+                "total_calls": len(self._services),
+                "total_cost": self._total_cost,
+                "total_tokens": self._total_tokens,
+                "total_input_tokens": self._total_input_tokens,
+                "total_output_tokens": self._total_output_tokens,
+                "service_costs": dict(self._service_costs),
+                "calls_by_service": self._get_calls_by_service(),
+                "calls_by_status": self._get_calls_by_status(),
+                "token_usage_by_service": self._get_token_usage_by_service()
+            }
     
     def _get_calls_by_service(self) -> Dict[str, int]:
         """Count calls by service"""
-        service_counts = defaultdict(int)
-        for call in self.calls:
-            service_counts[call.service] += 1
-        return dict(service_counts)
+        return dict(self._calls_by_service)
     
     def _get_calls_by_status(self) -> Dict[str, int]:
         """Count calls by status"""
-        status_counts = defaultdict(int)
-        for call in self.calls:
-            status_counts[call.status] += 1
-        return dict(status_counts)
+        return dict(self._calls_by_status)
     
     def _get_token_usage_by_service(self) -> Dict[str, Dict[str, int]]:
         """Get token usage by service"""
-        service_tokens = defaultdict(lambda: {"input": 0, "output": 0, "total": 0})
-        for call in self.calls:
-            service_tokens[call.service]["input"] += call.input_tokens
-            service_tokens[call.service]["output"] += call.output_tokens
-            service_tokens[call.service]["total"] += call.total_tokens
-        return dict(service_tokens)
+        return {service: dict(tokens) for service, tokens in self._tokens_by_service.items()}
     
     def export_logs(self, filepath: str = None) -> str:
         """Export logs to a JSON file or return as a string"""
-        log_data = []
-        for call in self.calls:
-            log_data.append({
-                "timestamp": call.timestamp.isoformat(),
-                "service": call.service,
-                "endpoint": call.endpoint,
-                "status": call.status,
-                "duration": call.duration,
-                "cost": call.cost,
-                "input_tokens": call.input_tokens,
-                "output_tokens": call.output_tokens,
-                "total_tokens": call.total_tokens,
-                "model": call.model,
-                "prompt_size": call.prompt_size
-            })
-        
+        # orjson serializes the APICall dataclasses (and their datetimes) directly
         export_data = {
-            "logs": log_data,
+            "logs": self.calls,
             "summary": self.get_summary()
         }
         
         if filepath:
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            with open(filepath, 'w') as f:
-                json.dump(export_data, f, indent=2)
+            # Only create (and stat) each export directory once per process
+            directory = os.path.dirname(filepath)
+            if directory and directory not in APITracker._ensured_dirs:
+                os.makedirs(directory, exist_ok=True)
+                APITracker._ensured_dirs.add(directory)
+            # Serialize to bytes up front and hand them to a large buffer in one write
+            with open(filepath, 'wb', buffering=EXPORT_BUFFER_SIZE) as f:
+                f.write(orjson.dumps(export_data, option=orjson.OPT_INDENT_2))
             return f"Logs exported to {filepath}"
         else:
-            return json.dumps(export_data, indent=2)
+            return orjson.dumps(export_data, option=orjson.OPT_INDENT_2).decode()
     
     def reset(self):
         """Reset the tracker"""
-        self.calls.clear()
-        self.service_costs.clear()
-        self.total_cost = 0.0
-        self.total_tokens = 0
-        self.total_input_tokens = 0
-        self.total_output_tokens = 0
\ No newline at end of file
+        self._wait_for_pending()
+        # Under the lock so a call recorded concurrently lands wholly in the old or the new state;
+        # rebinding rather than clear() keeps earlier snapshots stable
+        with self._state_lock:
+            self._reset_state()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
-import json
+import re
+import orjson
 import logging
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -51,6 +52,10 @@ SPECIFIC INSTRUCTIONS:
 {format_instructions}
 """
 
+# Code fence around LLM JSON output: everything between the opening fence and the last closing one
+_FENCE_RE = re.compile(r"^\s*```(?:json)?(.*)```", re.DOTALL)
+_OPEN_FENCE_RE = re.compile(r"^\s*```(?:json)?")
+
 def _clean_json_output(json_str: any) -> str:
     """
     Clean and format JSON string output from LLM.
@@ -59,29 +64,21 @@ def _clean_json_output(json_str: any) -> str:
         json_str: The JSON string (or object with content) to clean
         
     Returns:
-        str: Cleaned JSON string that matches expected schema
+        str: Cleaned JSON string, ready to decode
     """
     if json_str is None:
         logger.warning("Received None response from LLM")
         return "{}"
         
     if not isinstance(json_str, str):
-        if hasattr(json_str, "content"):
-            json_str = json_str.content
-        else:
-            json_str = str(json_str)
+        json_str = getattr(json_str, "content", None) or str(json_str)
     
-    # Remove any code fences if present
-    if json_str.startswith("```json"):
-        json_str = json_str.replace("```json", "", 1)
-        fence_end = json_str.rfind("```")
-        if fence_end != -1:
-            json_str = json_str[:fence_end]
-    elif json_str.startswith("```"):
-        json_str = json_str.replace("```", "", 1)
-        fence_end = json_str.rfind("```")
-        if fence_end != -1:
-            json_str = json_str[:fence_end]
+    # Remove any code fences if present (an unterminated fence only loses its opening)
+    fenced = _FENCE_RE.match(json_str)
+    if fenced:
+        json_str = fenced.group(1)
+    else:
+        json_str = _OPEN_FENCE_RE.sub("", json_str, count=1)
                 
     json_str = json_str.strip()
     
@@ -99,15 +96,34 @@ def _clean_json_output(json_str: any) -> str:
     if json_str.startswith('{') and json_str.endswith('}]'):
         json_str = json_str[:-1]
 
-    # Attempt to parse the JSON string and extract items if needed
+    return json_str
+
+def _parse_llm_output(content: any) -> AssessmentQuiz:
+    """
+    Parse LLM output into an AssessmentQuiz with a single JSON decode.
+    
+    The cleaned text is decoded once and validated as Python objects, rather than
+    re-serialized for PydanticOutputParser to decode again. Text orjson rejects is
+    handed to the lenient PydanticOutputParser instead.
+    
+    Args:
+        content: The LLM response content (or object with content)
+        
+    Returns:
+        AssessmentQuiz: The validated quiz
+    """
+    json_str = _clean_json_output(content)
     try:
-        data = json.loads(json_str)
-        if isinstance(data, dict) and "items" in data:
-            data = data["items"]
-        return json.dumps(data)
-    except Exception as e:
-        logger.error(f"Failed to parse JSON: {e}")
-        return json_str
+        data = orjson.loads(json_str)
+    except orjson.JSONDecodeError as e:
+        # Strict decode failed (raw control characters, prose around the fence, truncation):
+        # let the more lenient PydanticOutputParser have a go, as before
+        logger.warning(f"Fast JSON parse failed ({e}); falling back to PydanticOutputParser")
+        return _QUIZ_PARSER.parse(json_str)
+    # Extract items if needed
+    if isinstance(data, dict) and "items" in data:
+        data = data["items"]
+    return AssessmentQuiz.model_validate(data)
 
 def initialize_llm():
     api_key = os.environ.get("GOOGLE_API_KEY")
@@ -120,16 +136,22 @@ def initialize_llm():
         # callbacks parameter omitted
     )
 
+# Parser and prompt don't depend on instance state, so the schema-to-JSON
+# format instructions are rendered once at import instead of per QuizGenerator
+_QUIZ_PARSER = PydanticOutputParser(pydantic_object=AssessmentQuiz)
+_ASSESSMENT_QUIZ_PROMPT = ChatPromptTemplate.from_template(
+    template=assessment_quiz_template,
+    partial_variables={"format_instructions": _QUIZ_PARSER.get_format_instructions()}
+)
+
 class QuizGenerator:
     """Class to generate assessment quizzes using LLM or dummy data."""
+    quiz_parser = _QUIZ_PARSER
+    prompt = _ASSESSMENT_QUIZ_PROMPT
+
     def __init__(self):
         try:
             self.llm = initialize_llm()
-            self.quiz_parser = PydanticOutputParser(pydantic_object=AssessmentQuiz)
-            self.prompt = ChatPromptTemplate.from_template(
-                template=assessment_quiz_template,
-                partial_variables={"format_instructions": self.quiz_parser.get_format_instructions()}
-            )
             self.chain = self.prompt | self.llm
             self.use_llm = True
         except Exception as e:
@@ -146,10 +168,8 @@ class QuizGenerator:
                     "num_medium": num_medium,
                     "num_hard": num_hard
                 })
-                # Clean the JSON output before parsing
-                cleaned_output = _clean_json_output(response.content)
-                quiz = self.quiz_parser.parse(cleaned_output)
-                return [q.dict() for q in quiz.root]
+                quiz = _parse_llm_output(response.content)
+                return quiz.model_dump()
             except Exception as e:
                 print(f"Error generating quiz: {e}")
         # Fallback to dummy questions
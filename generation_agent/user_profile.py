@@ -1,37 +1,190 @@
 import os
+import re
 import json
 import sqlite3
 from datetime import datetime, timedelta
 import pathlib
 import threading
+import atexit
+import queue
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+
+import msgpack
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
+
+# JSON columns are stored as TEXT either way so SQLite's JSON1 functions can read them
+if orjson is not None:
+    def _json_dumps(obj):
+        return orjson.dumps(obj).decode()
+    _json_loads = orjson.loads
+else:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+# Columns selected as "name [JSON]" arrive already decoded (see _open_connection)
+sqlite3.register_converter("JSON", _json_loads)
+
+# learning_paths.path_data_mp holds msgpack; it is the profile's largest column
+def _msgpack_dumps(obj):
+    return msgpack.packb(obj, use_bin_type=True)
+
+def _msgpack_loads(data):
+    # Accept non-str map keys too; JSON used to coerce them to strings instead of rejecting them
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+sqlite3.register_converter("MSGPACK", _msgpack_loads)
+
+# Module durations such as "2 hours", "30 minutes" or "6-8 hours"
+_TIME_RE = re.compile(r"(?P<lo>\d+(?:\.\d+)?)(?:\s*-\s*(?P<hi>\d+(?:\.\d+)?))?\s*(?P<unit>hour|minute)", re.I)
+
+@lru_cache(maxsize=256)
+def _parse_hours(time_str):
+    """Hours in an estimated_time string, averaging ranges.
+
+    Strings with no duration ("", "TBD", "3 days") count as 0; ones that look like a range or
+    an hour/minute duration but don't parse count as 1.0.
+    """
+    m = _TIME_RE.search(time_str)
+    if m is None:
+        lowered = time_str.lower()
+        return 1.0 if "-" in lowered or "hour" in lowered or "minute" in lowered else 0.0
+    hours = (float(m["lo"]) + float(m["hi"] or m["lo"])) / 2
+    return hours / 60 if m["unit"].lower() == "minute" else hours
+
+# Timeline dates are persisted as isoformat strings, so parsed values are memoized here
+# rather than stored next to them
+_parse_iso = lru_cache(maxsize=256)(datetime.fromisoformat)
 
 class UserProfile:
     # Class variable for the database path
     db_path = "user_profiles.db"
-    # Thread-local storage for connections
-    _local = threading.local()
+    # Idle connections per database path, shared by every instance and thread (see _connection)
+    _pools = {}
+    _pools_lock = threading.Lock()
+    
+    # Users loaded per batch of IN (...) queries in get_many
+    _BULK_LOAD_SIZE = 500
+    # Database paths whose tables have already been created in this process
+    _schema_ready = set()
+    _schema_lock = threading.Lock()
+    
+    # Recently used instances per (db_path, user_id), least recent first (see get)
+    _INSTANCE_CACHE_SIZE = 1024
+    _instances = OrderedDict()
+    # Write count per (db_path, user_id); an instance loaded at an older count is stale
+    _versions = {}
+    _instances_lock = threading.Lock()
+    
+    # Shared by _create_tables and the table rebuild in _migrate_path_data
+    _LEARNING_PATHS_DDL = '''
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            path_id TEXT NOT NULL,
+            path_data_mp BLOB NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            UNIQUE(user_id, path_id)
+        )
+        '''
     
     def __init__(self, user_id):
+        cls = type(self)
+        cls._ensure_schema()
+        # Read the write count before loading, so a write racing the load marks this instance stale
+        version = cls._current_version(user_id)
+        self._set_loaded(user_id, cls._load_profile(user_id), version)
+    
+    @classmethod
+    def _from_loaded(cls, user_id, profile, version):
+        """Build an instance around a profile that has already been read (see get_many)"""
+        instance = cls.__new__(cls)
+        instance._set_loaded(user_id, profile, version)
+        return instance
+    
+    def _set_loaded(self, user_id, profile, version):
+        """Initialize instance state for a loaded profile; shared by __init__ and _from_loaded"""
         self.user_id = user_id
-        self._initialize_db()
-        self.profile = self._load_profile()
-    
-    def _get_connection(self):
-        """Get a thread-local database connection"""
-        if not hasattr(self._local, 'conn') or self._local.conn is None:
-            self._local.conn = sqlite3.connect(self.db_path)
-            self._local.conn.row_factory = sqlite3.Row
-        return self._local.conn
-    
-    def _get_cursor(self):
-        """Get a cursor from the thread-local connection"""
-        return self._get_connection().cursor()
-        
-    def _initialize_db(self):
-        """Initialize the SQLite database and create tables if they don't exist"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        self._version = version
+        self.profile = profile
+        # Topic count and estimated hours per path_id, filled on first use and dropped when
+        # the path is replaced
+        self._total_topics = {}
+        self._total_hours = {}
+    
+    @classmethod
+    def _open_connection(cls):
+        """Open a new database connection configured for pooled use"""
+        # Autocommit mode (isolation_level=None); multi-statement writes use _transaction().
+        # check_same_thread=False lets a pooled connection move between threads.
+        # PARSE_COLNAMES applies the JSON converter to columns aliased as "name [JSON]"
+        conn = sqlite3.connect(
+            cls.db_path, check_same_thread=False, isolation_level=None, detect_types=sqlite3.PARSE_COLNAMES
+        )
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers run alongside a writer; NORMAL sync skips the fsync per commit
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-20000")
+        return conn
+    
+    @classmethod
+    def _get_pool(cls):
+        """Get the idle-connection pool for the current db_path"""
+        with cls._pools_lock:
+            if cls.db_path not in cls._pools:
+                cls._pools[cls.db_path] = queue.LifoQueue()
+            return cls._pools[cls.db_path]
+    
+    @classmethod
+    @contextmanager
+    def _connection(cls):
+        """Lease a pooled connection for the duration of the block, opening one if none is idle"""
+        pool = cls._get_pool()
+        try:
+            conn = pool.get_nowait()
+        except queue.Empty:
+            conn = cls._open_connection()
+        try:
+            yield conn
+        finally:
+            pool.put(conn)
+    
+    @classmethod
+    @contextmanager
+    def _transaction(cls):
+        """Run the block in an explicit BEGIN/COMMIT, rolling back on error"""
+        with cls._connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
         
+    @classmethod
+    def _ensure_schema(cls):
+        """Create the tables once per process and db_path; a no-op afterwards"""
+        if cls.db_path in cls._schema_ready:
+            return
+        with cls._schema_lock:
+            if cls.db_path not in cls._schema_ready:
+                with cls._transaction() as conn:
+                    cls._create_tables(conn.cursor())
+                    cls._migrate_path_data(conn.cursor())
+                cls._schema_ready.add(cls.db_path)
+    
+    @staticmethod
+    def _create_tables(cursor):
+        """Create the profile tables if they don't exist"""
         # Create users table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -43,16 +196,7 @@ class UserProfile:
         ''')
         
         # Create learning_paths table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS learning_paths (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT NOT NULL,
-            path_id TEXT NOT NULL,
-            path_data TEXT NOT NULL,
-            FOREIGN KEY (user_id) REFERENCES users(user_id),
-            UNIQUE(user_id, path_id)
-        )
-        ''')
+        cursor.execute(UserProfile._LEARNING_PATHS_DDL.format(table="learning_paths"))
         
         # Create progress table
         cursor.execute('''
@@ -70,6 +214,30 @@ class UserProfile:
         )
         ''')
         
+        # Completions, one row each; progress.completed_modules/completed_topics only hold legacy lists
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS completed_topics (
+            user_id TEXT NOT NULL,
+            path_id TEXT NOT NULL,
+            module_index INTEGER NOT NULL,
+            topic_index INTEGER NOT NULL,
+            completed_at TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            PRIMARY KEY (user_id, path_id, module_index, topic_index)
+        )
+        ''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS completed_modules (
+            user_id TEXT NOT NULL,
+            path_id TEXT NOT NULL,
+            module_index INTEGER NOT NULL,
+            completed_at TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            PRIMARY KEY (user_id, path_id, module_index)
+        )
+        ''')
+        
         # Create quiz_results table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS quiz_results (
@@ -85,62 +253,215 @@ class UserProfile:
         )
         ''')
         
-        conn.commit()
+        # Expression index for find_user_ids_by_learning_level; the query must use the same expression
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_users_learning_level ON users (json_extract(preferences, '$.learning_level'))"
+        )
     
-    def _load_profile(self):
-        """Load user profile from database, create if it doesn't exist"""
-        cursor = self._get_cursor()
-        
-        # Check if user exists
-        cursor.execute("SELECT preferences FROM users WHERE user_id = ?", (self.user_id,))
-        result = cursor.fetchone()
+    @staticmethod
+    def _migrate_path_data(cursor):
+        """Rewrite a learning_paths table from an older version, with JSON path_data, as msgpack"""
+        columns = {row['name'] for row in cursor.execute("PRAGMA table_info(learning_paths)")}
+        if "path_data" not in columns:
+            return
         
-        if result:
-            # User exists, load their data
-            preferences = json.loads(result[0])
-            
-            # Load learning paths
-            learning_paths = {}
-            cursor.execute("SELECT path_id, path_data FROM learning_paths WHERE user_id = ?", (self.user_id,))
-            for row in cursor.fetchall():
-                path_id, path_data = row['path_id'], row['path_data']
-                learning_paths[path_id] = json.loads(path_data)
-            
-            # Load progress
-            progress = {}
-            cursor.execute(
-                "SELECT path_id, current_module, current_topic, completed_modules, completed_topics, last_accessed "
-                "FROM progress WHERE user_id = ?", 
-                (self.user_id,)
+        rows = cursor.execute(
+            'SELECT id, user_id, path_id, path_data AS "path_data [JSON]" FROM learning_paths'
+        ).fetchall()
+        if sqlite3.sqlite_version_info >= (3, 35, 0):
+            cursor.execute("ALTER TABLE learning_paths ADD COLUMN path_data_mp BLOB")
+            cursor.executemany(
+                "UPDATE learning_paths SET path_data_mp = ? WHERE id = ?",
+                [(_msgpack_dumps(row['path_data']), row['id']) for row in rows]
             )
-            for row in cursor.fetchall():
-                progress[row['path_id']] = {
-                    "current_module": row['current_module'],
-                    "current_topic": row['current_topic'],
-                    "completed_modules": json.loads(row['completed_modules']),
-                    "completed_topics": json.loads(row['completed_topics']),
-                    "last_accessed": row['last_accessed']
-                }
-            
-            # Load quiz results
-            quiz_results = {}
-            cursor.execute("SELECT path_id, topic_id, score, passed, timestamp FROM quiz_results WHERE user_id = ?", (self.user_id,))
-            for row in cursor.fetchall():
-                path_id, topic_id = row['path_id'], row['topic_id']
-                if path_id not in quiz_results:
-                    quiz_results[path_id] = {}
-                quiz_results[path_id][topic_id] = {
-                    "score": row['score'],
-                    "passed": bool(row['passed']),
-                    "timestamp": row['timestamp']
-                }
-            
-            return {
-                "learning_paths": learning_paths,
-                "progress": progress,
-                "quiz_results": quiz_results,
+            cursor.execute("ALTER TABLE learning_paths DROP COLUMN path_data")
+        else:
+            # No DROP COLUMN before SQLite 3.35: rebuild the table under the current schema
+            cursor.execute(UserProfile._LEARNING_PATHS_DDL.format(table="learning_paths_new"))
+            cursor.executemany(
+                "INSERT INTO learning_paths_new (id, user_id, path_id, path_data_mp) VALUES (?, ?, ?, ?)",
+                [(row['id'], row['user_id'], row['path_id'], _msgpack_dumps(row['path_data'])) for row in rows]
+            )
+            cursor.execute("DROP TABLE learning_paths")
+            cursor.execute("ALTER TABLE learning_paths_new RENAME TO learning_paths")
+    
+    @classmethod
+    def _load_profile(cls, user_id):
+        """Load user profile from database, create if it doesn't exist"""
+        with cls._connection() as conn:
+            return cls._read_profile(conn, user_id)
+    
+    @classmethod
+    def _read_profiles(cls, conn, user_ids):
+        """Read the stored profiles for user_ids with one query per table; unknown users are omitted"""
+        placeholders = ", ".join("?" * len(user_ids))
+        params = tuple(user_ids)
+        # Plain tuples, unpacked positionally and streamed from the cursor, are cheaper
+        # than sqlite3.Row lookups by name
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        
+        profiles = {}
+        cursor.execute(
+            f'SELECT user_id, preferences AS "preferences [JSON]" FROM users WHERE user_id IN ({placeholders})',
+            params
+        )
+        for user_id, preferences in cursor:
+            profiles[user_id] = {
+                "learning_paths": {},
+                "progress": {},
+                "quiz_results": {},
                 "preferences": preferences
             }
+        if not profiles:
+            return profiles
+        
+        # Load learning paths
+        cursor.execute(
+            f'SELECT user_id, path_id, path_data_mp AS "path_data [MSGPACK]" FROM learning_paths WHERE user_id IN ({placeholders})',
+            params
+        )
+        for user_id, path_id, path_data in cursor:
+            profiles[user_id]["learning_paths"][path_id] = path_data
+        
+        # Load progress
+        cursor.execute(
+            'SELECT user_id, path_id, current_module, current_topic, completed_modules AS "completed_modules [JSON]", '
+            'completed_topics AS "completed_topics [JSON]", last_accessed '
+            f"FROM progress WHERE user_id IN ({placeholders})", 
+            params
+        )
+        for user_id, path_id, current_module, current_topic, completed_modules, completed_topics, last_accessed in cursor:
+            profiles[user_id]["progress"][path_id] = {
+                "current_module": current_module,
+                "current_topic": current_topic,
+                "completed_modules": completed_modules,
+                # A set while loaded; save_profile writes it out as completed_topics rows
+                "completed_topics": set(completed_topics),
+                "last_accessed": last_accessed
+            }
+        
+        # Merge in completions from their own tables
+        cursor.execute(
+            "SELECT user_id, path_id, module_index, topic_index FROM completed_topics "
+            f"WHERE user_id IN ({placeholders})",
+            params
+        )
+        for user_id, path_id, module_index, topic_index in cursor:
+            progress = profiles[user_id]["progress"].get(path_id)
+            if progress is not None:
+                progress["completed_topics"].add(f"{module_index}_{topic_index}")
+        
+        cursor.execute(
+            "SELECT user_id, path_id, module_index FROM completed_modules "
+            f"WHERE user_id IN ({placeholders}) ORDER BY rowid",
+            params
+        )
+        for user_id, path_id, module_index in cursor:
+            progress = profiles[user_id]["progress"].get(path_id)
+            if progress is not None and module_index not in progress["completed_modules"]:
+                progress["completed_modules"].append(module_index)
+        
+        # Load quiz results
+        cursor.execute(
+            f"SELECT user_id, path_id, topic_id, score, passed, timestamp FROM quiz_results WHERE user_id IN ({placeholders})",
+            params
+        )
+        for user_id, path_id, topic_id, score, passed, timestamp in cursor:
+            quiz_results = profiles[user_id]["quiz_results"]
+            if path_id not in quiz_results:
+                quiz_results[path_id] = {}
+            quiz_results[path_id][topic_id] = {
+                "score": score,
+                "passed": bool(passed),
+                "timestamp": timestamp
+            }
+        
+        return profiles
+    
+    @classmethod
+    def get(cls, user_id):
+        """Return a UserProfile for user_id, reusing a recently loaded instance if no other
+        instance has written to that user since"""
+        key = (cls.db_path, user_id)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is not None and instance._version == cls._versions.get(key, 0):
+                cls._instances.move_to_end(key)
+                return instance
+        
+        instance = cls(user_id)
+        with cls._instances_lock:
+            cls._instances[key] = instance
+            cls._instances.move_to_end(key)
+            while len(cls._instances) > cls._INSTANCE_CACHE_SIZE:
+                cls._instances.popitem(last=False)
+        return instance
+    
+    @classmethod
+    def _current_version(cls, user_id):
+        return cls._versions.get((cls.db_path, user_id), 0)
+    
+    @classmethod
+    def _bump_versions(cls, user_ids):
+        """Record a write to each user's profile, making other loaded instances stale"""
+        with cls._instances_lock:
+            for user_id in user_ids:
+                key = (cls.db_path, user_id)
+                cls._versions[key] = cls._versions.get(key, 0) + 1
+    
+    @contextmanager
+    def _write(self):
+        """Run the block in a transaction, then record the write to this user's profile"""
+        with self._transaction() as conn:
+            yield conn
+        key = (self.db_path, self.user_id)
+        with self._instances_lock:
+            version = self._versions.get(key, 0)
+            self._versions[key] = version + 1
+            # An instance that was current stays current after its own write
+            if self._version == version:
+                self._version = version + 1
+    
+    @classmethod
+    def find_user_ids_by_learning_level(cls, learning_level):
+        """Return the ids of users whose preferences have the given learning_level"""
+        cls._ensure_schema()
+        with cls._connection() as conn:
+            # Filtered by SQLite via idx_users_learning_level; no preferences are decoded in Python
+            rows = conn.execute(
+                "SELECT user_id FROM users WHERE json_extract(preferences, '$.learning_level') = ?",
+                (learning_level,)
+            ).fetchall()
+        return [row['user_id'] for row in rows]
+    
+    @classmethod
+    def get_many(cls, user_ids):
+        """Load several profiles at once, returning {user_id: UserProfile}; unknown users get new profiles"""
+        cls._ensure_schema()
+        user_ids = list(dict.fromkeys(user_ids))
+        versions = {user_id: cls._current_version(user_id) for user_id in user_ids}
+        loaded = {}
+        with cls._connection() as conn:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(user_ids), cls._BULK_LOAD_SIZE):
+                loaded.update(cls._read_profiles(conn, user_ids[i:i + cls._BULK_LOAD_SIZE]))
+        
+        profiles = {}
+        for user_id in user_ids:
+            if user_id in loaded:
+                profiles[user_id] = cls._from_loaded(user_id, loaded[user_id], versions[user_id])
+            else:
+                profiles[user_id] = cls(user_id)
+        return profiles
+    
+    @classmethod
+    def _read_profile(cls, conn, user_id):
+        """Read the profile on the given connection, inserting a default one for new users"""
+        profile = cls._read_profiles(conn, [user_id]).get(user_id)
+        
+        if profile:
+            return profile
         else:
             # User doesn't exist, create new profile
             now = datetime.now().isoformat()
@@ -160,14 +481,11 @@ class UserProfile:
                 }
             }
             
-            # Insert new user
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
+            # Insert new user (a single statement, committed on its own in autocommit mode)
+            conn.execute(
                 "INSERT INTO users (user_id, preferences, created_at, updated_at) VALUES (?, ?, ?, ?)",
-                (self.user_id, json.dumps(default_preferences), now, now)
+                (user_id, _json_dumps(default_preferences), now, now)
             )
-            conn.commit()
             
             return {
                 "learning_paths": {},
@@ -176,96 +494,216 @@ class UserProfile:
                 "preferences": default_preferences
             }
     
+    @staticmethod
+    def _profile_rows(user_id, profile, now, rows):
+        """Append the rows for one profile to rows, a {table: [params]} dict of parameter lists"""
+        rows.setdefault("users", []).append(
+            (user_id, _json_dumps(profile["preferences"]), now, now)
+        )
+        rows.setdefault("learning_paths", []).extend(
+            (user_id, path_id, _msgpack_dumps(path_data))
+            for path_id, path_data in profile["learning_paths"].items()
+        )
+        # Completion lists are stored row-wise in completed_topics/completed_modules,
+        # so the legacy JSON columns are written empty
+        rows.setdefault("progress", []).extend(
+            (
+                user_id, 
+                path_id, 
+                progress_data["current_module"], 
+                progress_data["current_topic"],
+                "[]",
+                "[]",
+                progress_data.get("last_accessed") or now
+            )
+            for path_id, progress_data in profile["progress"].items()
+        )
+        rows.setdefault("completed_topics", []).extend(
+            (user_id, path_id, *map(int, topic_id.split("_")), now)
+            for path_id, progress_data in profile["progress"].items()
+            for topic_id in progress_data["completed_topics"]
+        )
+        rows.setdefault("completed_modules", []).extend(
+            (user_id, path_id, module_index, now)
+            for path_id, progress_data in profile["progress"].items()
+            for module_index in progress_data["completed_modules"]
+        )
+        rows.setdefault("quiz_results", []).extend(
+            (
+                user_id, 
+                path_id, 
+                topic_id, 
+                result["score"], 
+                1 if result["passed"] else 0,
+                result["timestamp"]
+            )
+            for path_id, topics in profile["quiz_results"].items()
+            for topic_id, result in topics.items()
+        )
+        return rows
+    
+    @staticmethod
+    def _write_profile_rows(cursor, rows):
+        """Write rows built by _profile_rows with one executemany per table"""
+        # Save users and preferences, keeping created_at for existing users
+        cursor.executemany(
+            "INSERT INTO users (user_id, preferences, created_at, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET preferences = excluded.preferences, updated_at = excluded.updated_at",
+            rows.get("users", [])
+        )
+        
+        # Save learning paths
+        cursor.executemany(
+            "INSERT OR REPLACE INTO learning_paths (user_id, path_id, path_data_mp) VALUES (?, ?, ?)",
+            rows.get("learning_paths", [])
+        )
+        
+        # Save progress
+        cursor.executemany(
+            "INSERT OR REPLACE INTO progress (user_id, path_id, current_module, current_topic, completed_modules, completed_topics, last_accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows.get("progress", [])
+        )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO completed_topics (user_id, path_id, module_index, topic_index, completed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows.get("completed_topics", [])
+        )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO completed_modules (user_id, path_id, module_index, completed_at) "
+            "VALUES (?, ?, ?, ?)",
+            rows.get("completed_modules", [])
+        )
+        
+        # Save quiz results
+        cursor.executemany(
+            "INSERT OR REPLACE INTO quiz_results (user_id, path_id, topic_id, score, passed, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows.get("quiz_results", [])
+        )
+    
     def save_profile(self):
-        """Save the profile back to the database"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        """Flush the whole profile to the database in a single transaction.
+
+        The mutators below write only the rows they touch; this is an explicit full save.
+        """
+        rows = self._profile_rows(self.user_id, self.profile, datetime.now().isoformat(), {})
         
-        # Update preferences
-        now = datetime.now().isoformat()
+        # One transaction (one commit) for the whole profile; rolled back on error
+        with self._write() as conn:
+            self._write_profile_rows(conn.cursor(), rows)
+    
+    @staticmethod
+    def _drain_pool(pool):
+        """Close every idle connection in pool"""
+        while True:
+            try:
+                conn = pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+    
+    @classmethod
+    def close_connection(cls):
+        """Close the idle pooled connections for the current db_path"""
+        cls._drain_pool(cls._get_pool())
+    
+    @classmethod
+    def _close_all_connections(cls):
+        """Close the idle pooled connections for every db_path; runs at interpreter exit"""
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+        for pool in pools:
+            cls._drain_pool(pool)
+    
+    def _save_preferences(self, cursor):
+        """Write the preferences row"""
         cursor.execute(
             "UPDATE users SET preferences = ?, updated_at = ? WHERE user_id = ?",
-            (json.dumps(self.profile["preferences"]), now, self.user_id)
+            (_json_dumps(self.profile["preferences"]), datetime.now().isoformat(), self.user_id)
+        )
+    
+    def _save_progress(self, cursor, path_id, module_index=None, topic_index=None):
+        """Write the progress row for path_id, plus the completion rows for the given topic"""
+        progress_data = self.profile["progress"][path_id]
+        cursor.execute(
+            "UPDATE progress SET current_module = ?, current_topic = ?, last_accessed = ? "
+            "WHERE user_id = ? AND path_id = ?",
+            (
+                progress_data["current_module"],
+                progress_data["current_topic"],
+                progress_data["last_accessed"],
+                self.user_id,
+                path_id
+            )
         )
+        if module_index is None:
+            return
         
-        # Save learning paths
-        for path_id, path_data in self.profile["learning_paths"].items():
+        if f"{module_index}_{topic_index}" in progress_data["completed_topics"]:
             cursor.execute(
-                "INSERT OR REPLACE INTO learning_paths (user_id, path_id, path_data) VALUES (?, ?, ?)",
-                (self.user_id, path_id, json.dumps(path_data))
+                "INSERT OR IGNORE INTO completed_topics (user_id, path_id, module_index, topic_index, completed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.user_id, path_id, module_index, topic_index, progress_data["last_accessed"])
             )
-        
-        # Save progress
-        for path_id, progress_data in self.profile["progress"].items():
+        if module_index in progress_data["completed_modules"]:
             cursor.execute(
-                "INSERT OR REPLACE INTO progress (user_id, path_id, current_module, current_topic, completed_modules, completed_topics, last_accessed) "
-                "VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (
-                    self.user_id, 
-                    path_id, 
-                    progress_data["current_module"], 
-                    progress_data["current_topic"],
-                    json.dumps(progress_data["completed_modules"]),
-                    json.dumps(progress_data["completed_topics"]),
-                    progress_data.get("last_accessed", datetime.now().isoformat())
-                )
+                "INSERT OR IGNORE INTO completed_modules (user_id, path_id, module_index, completed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (self.user_id, path_id, module_index, progress_data["last_accessed"])
             )
-        
-        # Save quiz results
-        for path_id, topics in self.profile["quiz_results"].items():
-            for topic_id, result in topics.items():
-                cursor.execute(
-                    "INSERT OR REPLACE INTO quiz_results (user_id, path_id, topic_id, score, passed, timestamp) "
-                    "VALUES (?, ?, ?, ?, ?, ?)",
-                    (
-                        self.user_id, 
-                        path_id, 
-                        topic_id, 
-                        result["score"], 
-                        1 if result["passed"] else 0,
-                        result["timestamp"]
-                    )
-                )
-        
-        conn.commit()
-    
-    def close_connection(self):
-        """Close the database connection for the current thread"""
-        if hasattr(self._local, 'conn') and self._local.conn:
-            self._local.conn.close()
-            self._local.conn = None
-    
-    def __del__(self):
-        """Attempt to close the connection when the object is destroyed"""
-        try:
-            self.close_connection()
-        except:
-            pass
     
     def add_learning_path(self, path_id, path_data):
+        now = datetime.now().isoformat()
         self.profile["learning_paths"][path_id] = path_data
+        self._total_topics.pop(path_id, None)
+        self._total_hours.pop(path_id, None)
         self.profile["progress"][path_id] = {
             "current_module": 0,
             "current_topic": 0,
             "completed_modules": [],
-            "completed_topics": [],
-            "last_accessed": datetime.now().isoformat()
+            "completed_topics": set(),
+            "last_accessed": now
         }
-        self.save_profile()
+        
+        with self._write() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO learning_paths (user_id, path_id, path_data_mp) VALUES (?, ?, ?)",
+                (self.user_id, path_id, _msgpack_dumps(path_data))
+            )
+            cursor.execute(
+                "INSERT OR REPLACE INTO progress (user_id, path_id, current_module, current_topic, completed_modules, completed_topics, last_accessed) "
+                "VALUES (?, ?, 0, 0, '[]', '[]', ?)",
+                (self.user_id, path_id, now)
+            )
+            # Re-adding a path starts it over
+            cursor.execute(
+                "DELETE FROM completed_topics WHERE user_id = ? AND path_id = ?", (self.user_id, path_id)
+            )
+            cursor.execute(
+                "DELETE FROM completed_modules WHERE user_id = ? AND path_id = ?", (self.user_id, path_id)
+            )
     
     def update_progress(self, path_id, module_index, topic_index, completed=False):
+        self._apply_progress(path_id, module_index, topic_index, completed, datetime.now().isoformat())
+        with self._write() as conn:
+            if completed:
+                self._save_progress(conn.cursor(), path_id, module_index, topic_index)
+            else:
+                self._save_progress(conn.cursor(), path_id)
+    
+    def _apply_progress(self, path_id, module_index, topic_index, completed, now):
+        """Apply a progress update to the in-memory profile without saving it"""
         if completed:
-            topic_id = f"{module_index}_{topic_index}"
-            if topic_id not in self.profile["progress"][path_id]["completed_topics"]:
-                self.profile["progress"][path_id]["completed_topics"].append(topic_id)
+            completed_topics = self.profile["progress"][path_id]["completed_topics"]
+            completed_topics.add(f"{module_index}_{topic_index}")
             
             # Check if module is completed
             module = self.profile["learning_paths"][path_id]["modules"][module_index]
-            all_topics_completed = True
-            for i in range(len(module["topics"])):
-                if f"{module_index}_{i}" not in self.profile["progress"][path_id]["completed_topics"]:
-                    all_topics_completed = False
-                    break
+            all_topics_completed = all(
+                f"{module_index}_{i}" in completed_topics for i in range(len(module["topics"]))
+            )
             
             if all_topics_completed and module_index not in self.profile["progress"][path_id]["completed_modules"]:
                 self.profile["progress"][path_id]["completed_modules"].append(module_index)
@@ -279,25 +717,52 @@ class UserProfile:
             self.profile["progress"][path_id]["current_topic"] = topic_index
             
         # Update last accessed timestamp
-        self.profile["progress"][path_id]["last_accessed"] = datetime.now().isoformat()
-        self.save_profile()
+        self.profile["progress"][path_id]["last_accessed"] = now
     
     def record_quiz_result(self, path_id, module_index, topic_index, score):
         topic_id = f"{module_index}_{topic_index}"
         if path_id not in self.profile["quiz_results"]:
             self.profile["quiz_results"][path_id] = {}
         
-        self.profile["quiz_results"][path_id][topic_id] = {
+        now = datetime.now().isoformat()
+        result = {
             "score": score,
             "passed": score >= 70,  # Assuming 70% is passing
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now
         }
+        self.profile["quiz_results"][path_id][topic_id] = result
         
-        # If passed, mark as completed
-        if score >= 70:
-            self.update_progress(path_id, module_index, topic_index, completed=True)
+        # If passed, mark as completed (saved together with the result below)
+        if result["passed"]:
+            self._apply_progress(path_id, module_index, topic_index, True, now)
         
-        self.save_profile()
+        with self._write() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR REPLACE INTO quiz_results (user_id, path_id, topic_id, score, passed, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.user_id, path_id, topic_id, score, 1 if result["passed"] else 0, result["timestamp"])
+            )
+            if result["passed"]:
+                self._save_progress(cursor, path_id, module_index, topic_index)
+    
+    def _count_topics(self, path_id):
+        """Total number of topics in a learning path, cached until the path is replaced"""
+        total_topics = self._total_topics.get(path_id)
+        if total_topics is None:
+            modules = self.profile["learning_paths"][path_id]["modules"]
+            total_topics = self._total_topics[path_id] = sum(len(module["topics"]) for module in modules)
+        return total_topics
+    
+    def _estimate_hours(self, path_id):
+        """Total estimated hours of a learning path, cached until the path is replaced"""
+        total_hours = self._total_hours.get(path_id)
+        if total_hours is None:
+            modules = self.profile["learning_paths"][path_id]["modules"]
+            total_hours = self._total_hours[path_id] = sum(
+                _parse_hours(module.get("estimated_time", "0 hours")) for module in modules
+            )
+        return total_hours
     
     def get_learning_path_progress(self, path_id):
         """Get a detailed progress summary for a learning path"""
@@ -307,7 +772,7 @@ class UserProfile:
         progress = self.profile["progress"][path_id]
         path_data = self.profile["learning_paths"][path_id]
         
-        total_topics = sum(len(module["topics"]) for module in path_data["modules"])
+        total_topics = self._count_topics(path_id)
         completed_topics = len(progress["completed_topics"])
         
         return {
@@ -342,7 +807,8 @@ class UserProfile:
             self.profile["preferences"]["time_constraints"]["weekly_hours"] = weekly_hours
         if target_completion_date:
             self.profile["preferences"]["time_constraints"]["target_completion_date"] = target_completion_date
-        self.save_profile()
+        with self._write() as conn:
+            self._save_preferences(conn.cursor())
 
     def update_timeline(self, path_id, start_date=None, milestone=None):
         """Update the learning timeline for a specific path"""
@@ -362,15 +828,15 @@ class UserProfile:
                 "path_id": path_id
             })
 
-        self.save_profile()
+        with self._write() as conn:
+            self._save_preferences(conn.cursor())
         return True
 
     def _calculate_completion_estimates(self, path_id):
-        """Calculate completion time estimates based on time constraints"""
+        """Calculate completion time estimates based on time constraints; the caller saves them"""
         if path_id not in self.profile["learning_paths"]:
             return
 
-        path_data = self.profile["learning_paths"][path_id]
         timeline = self.profile["preferences"]["timeline"]
         time_constraints = self.profile["preferences"]["time_constraints"]
 
@@ -378,34 +844,7 @@ class UserProfile:
             return
 
         # Calculate total estimated hours
-        total_hours = 0
-        for module in path_data["modules"]:
-            # Parse estimated time string (e.g., "2 hours", "30 minutes", "6-8 hours")
-            time_str = module.get("estimated_time", "0 hours")
-            hours = 0
-            
-            try:
-                # Check if it's a range like "6-8 hours"
-                if "-" in time_str:
-                    # Extract just the numeric part
-                    numeric_part = time_str.split()[0]
-                    parts = numeric_part.split("-")
-                    lower = float(parts[0].strip())
-                    upper = float(parts[1].strip())
-                    # Use the average of the range
-                    hours = (lower + upper) / 2
-                # Not a range, normal processing
-                elif "hour" in time_str:
-                    parts = time_str.split()
-                    hours = float(parts[0])
-                elif "minute" in time_str:
-                    parts = time_str.split()
-                    hours = float(parts[0]) / 60
-            except (ValueError, IndexError):
-                # If we can't parse it, use a default value
-                hours = 1.0
-                
-            total_hours += hours
+        total_hours = self._estimate_hours(path_id)
 
         # Calculate completion date based on time constraints
         daily_hours = time_constraints["daily_hours"]
@@ -418,7 +857,7 @@ class UserProfile:
         days_needed = total_hours / effective_daily_hours
         
         # Calculate estimated completion date
-        start_date = datetime.fromisoformat(timeline["start_date"])
+        start_date = _parse_iso(timeline["start_date"])
         estimated_completion = start_date + timedelta(days=days_needed)
         
         timeline["completion_estimates"][path_id] = {
@@ -427,13 +866,16 @@ class UserProfile:
             "estimated_completion": estimated_completion.isoformat(),
             "effective_daily_hours": effective_daily_hours
         }
-        
-        self.save_profile()
 
     def get_timeline_status(self, path_id):
         """Get the current timeline status for a path"""
-        if path_id not in self.profile["progress"]:
-            return None
+        return self.bulk_timeline_status([path_id])[path_id]
+
+    def bulk_timeline_status(self, path_ids):
+        """Get the current timeline status for several paths, as {path_id: status or None}"""
+        path_ids = list(path_ids)
+        if not any(path_id in self.profile["progress"] for path_id in path_ids):
+            return dict.fromkeys(path_ids)
 
         # Ensure preferences and timeline structure exists
         if "preferences" not in self.profile:
@@ -444,9 +886,22 @@ class UserProfile:
                 "milestones": [],
                 "completion_estimates": {}
             }
-            self.save_profile()
+            with self._write() as conn:
+                self._save_preferences(conn.cursor())
 
+        # The clock and the shared start date are read once for all paths
         timeline = self.profile["preferences"]["timeline"]
+        current_date = datetime.now()
+        return {
+            path_id: self._timeline_status(path_id, timeline, current_date)
+            for path_id in path_ids
+        }
+
+    def _timeline_status(self, path_id, timeline, current_date):
+        """Timeline status for one path as of current_date, or None without an estimate"""
+        if path_id not in self.profile["progress"]:
+            return None
+
         progress = self.profile["progress"][path_id]
         estimates = timeline.get("completion_estimates", {}).get(path_id, {})
         
@@ -454,9 +909,8 @@ class UserProfile:
             return None
 
         try:
-            current_date = datetime.now()
-            start_date = datetime.fromisoformat(timeline["start_date"])
-            estimated_completion = datetime.fromisoformat(estimates["estimated_completion"])
+            start_date = _parse_iso(timeline["start_date"])
+            estimated_completion = _parse_iso(estimates["estimated_completion"])
             
             # Calculate progress
             total_days = (estimated_completion - start_date).days
@@ -464,8 +918,7 @@ class UserProfile:
             progress_percentage = min(100, (days_elapsed / total_days) * 100) if total_days > 0 else 0
             
             # Calculate actual completion percentage
-            path_data = self.profile["learning_paths"][path_id]
-            total_topics = sum(len(module["topics"]) for module in path_data["modules"])
+            total_topics = self._count_topics(path_id)
             completed_topics = len(progress["completed_topics"])
             actual_progress = (completed_topics / total_topics * 100) if total_topics > 0 else 0
             
@@ -483,37 +936,53 @@ class UserProfile:
             
     @classmethod
     def migrate_json_to_sqlite(cls):
-        """Migrate existing JSON profiles to SQLite database"""
+        """Migrate existing JSON profiles to SQLite database in one transaction"""
         profiles_dir = "profiles"
         if not os.path.exists(profiles_dir):
             return False
             
-        # Create a temporary UserProfile instance to initialize the database
-        temp_profile = cls("temp")
+        cls._ensure_schema()
+        now = datetime.now().isoformat()
         
-        # Get all JSON files in the profiles directory
-        json_files = [f for f in os.listdir(profiles_dir) if f.endswith('.json')]
+        # Build every profile's rows first, then write them all in a single transaction
+        # (one commit) with one savepoint per profile
+        pending = []
+        with os.scandir(profiles_dir) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.endswith('.json'):
+                    continue
+                try:
+                    # Extract user_id from filename
+                    user_id = os.path.splitext(entry.name)[0]
+                    
+                    # Read the JSON file
+                    with open(entry.path, 'rb') as f:
+                        profile_data = _json_loads(f.read())
+                    
+                    pending.append((entry.name, user_id, cls._profile_rows(user_id, profile_data, now, {})))
+                except Exception as e:
+                    print(f"Error migrating profile {entry.name}: {e}")
         
-        for json_file in json_files:
-            try:
-                # Extract user_id from filename
-                user_id = os.path.splitext(json_file)[0]
-                
-                # Read the JSON file
-                with open(os.path.join(profiles_dir, json_file), 'r') as f:
-                    profile_data = json.load(f)
-                
-                # Create a UserProfile instance for this user
-                user_profile = cls(user_id)
-                
-                # Set the profile data
-                user_profile.profile = profile_data
-                
-                # Save to SQLite
-                user_profile.save_profile()
-                
-                print(f"Migrated profile for user: {user_id}")
-            except Exception as e:
-                print(f"Error migrating profile {json_file}: {e}")
+        migrated = []
+        with cls._transaction() as conn:
+            cursor = conn.cursor()
+            for name, user_id, profile_rows in pending:
+                # A profile the database rejects (e.g. a NULL timestamp) is undone on its own
+                cursor.execute("SAVEPOINT migrate_profile")
+                try:
+                    cls._write_profile_rows(cursor, profile_rows)
+                except sqlite3.Error as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT migrate_profile")
+                    print(f"Error migrating profile {name}: {e}")
+                else:
+                    migrated.append(user_id)
+                cursor.execute("RELEASE SAVEPOINT migrate_profile")
+        cls._bump_versions(migrated)
+        
+        for user_id in migrated:
+            print(f"Migrated profile for user: {user_id}")
                 
-        return True
\ No newline at end of file
+        return True
+
+# Connections live as long as the process; instances never close them
+atexit.register(UserProfile._close_all_connections)